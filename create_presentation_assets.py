@@ -5,78 +5,132 @@ Creates visualizations and comparisons without requiring actual model training.
 """
 
 import json
+import os
+import re
+import sys
+from contextlib import closing
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, Iterable, Iterator, List, Any, Tuple
+
+try:
+    import orjson
+except ImportError:  # fall back to stdlib json when orjson isn't installed
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # fall back to loading the whole samples file
+    ijson = None
+
+_PROMPT_LINE_RE = re.compile(r'^(?:Question:(.*)|\[Depth[^\n]*)', re.M)
+
+_get_outcomes = itemgetter('predictedOutcome', 'actualOutcome')
+
+# Parsed JSON files keyed by absolute path, stored as ((mtime_ns, size), data)
+_CACHE: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes, preferring orjson"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize to indented, newline-terminated UTF-8 JSON, preferring orjson"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, indent=2, ensure_ascii=False) + '\n').encode('utf-8')
+
+def _load_json(path: str) -> Any:
+    """Load a JSON file, cached until its mtime or size changes (do not mutate)"""
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    key = (st.st_mtime_ns, st.st_size)
+    cached = _CACHE.get(path)
+    if cached is None or cached[0] != key:
+        cached = (key, _loads(Path(path).read_bytes()))
+        _CACHE[path] = cached
+    return cached[1]
 
 def load_data():
-    """Load generated DPO training data"""
-    stats = json.load(open('dpo_classifier_statistics.json'))
-    samples = json.load(open('dpo_classifier_training_sample.json'))
+    """Load generated DPO training data (stats are cached; do not mutate)"""
+    stats = _load_json('dpo_classifier_statistics.json')
+    samples = iter_samples()
 
     return stats, samples
 
-def create_comparison_examples(samples: List[Dict], output_file: str):
+def iter_samples(path: str = 'dpo_classifier_training_sample.json') -> Iterator[Dict]:
+    """Yield training samples one at a time, streaming with ijson when available"""
+    if ijson is None:
+        yield from _load_json(path)
+        return
+
+    with open(path, 'rb') as f:
+        yield from ijson.items(f, 'item', use_float=True)
+
+def is_wrong_prediction(sample: Dict) -> bool:
+    """Check whether the classifier's prediction missed the actual outcome"""
+    predicted, actual = _get_outcomes(sample['metadata'])
+    return predicted != actual
+
+def _build_example(number: int, sample: Dict) -> Dict:
+    """Build one chosen-vs-rejected comparison entry"""
+    question, path = extract_question_and_path(sample['prompt'])
+    meta = sample['metadata']
+    predicted, actual = _get_outcomes(meta)
+    return {
+        "example_number": number,
+        "question": question,
+        "scenario_path": path,
+        "cumulative_probability": meta['cumulativeProbability'],
+        "model_said": {
+            "prediction": predicted,
+            "label": "REJECTED ❌",
+            "reasoning": "Model incorrectly predicted this outcome"
+        },
+        "actual_outcome": {
+            "answer": actual,
+            "label": "CHOSEN ✓",
+            "reasoning": "Verified historical outcome"
+        },
+        "dpo_action": f"Decrease P('{sample['rejected']}') and Increase P('{sample['chosen']}')"
+    }
+
+def create_comparison_examples(samples: Iterable[Dict], output_file: str):
     """Create side-by-side comparison of chosen vs rejected examples"""
 
     # Find examples where LLM was wrong (most interesting for presentation)
-    wrong_predictions = [s for s in samples if s['metadata']['predictedOutcome'] != s['metadata']['actualOutcome']]
-    right_predictions = [s for s in samples if s['metadata']['predictedOutcome'] == s['metadata']['actualOutcome']]
+    wrong_predictions = islice(filter(is_wrong_prediction, samples), 3)
+
+    # Show 3 compelling examples
+    examples = (_build_example(i, sample) for i, sample in enumerate(wrong_predictions, 1))
 
     comparison = {
         "title": "DPO Training: Learning from Mistakes",
         "subtitle": "Teaching the model to prefer correct predictions over incorrect ones",
-        "examples": []
+        "examples": list(examples)
     }
 
-    # Show 3 compelling examples
-    for i, sample in enumerate(wrong_predictions[:3], 1):
-        example = {
-            "example_number": i,
-            "question": extract_question(sample['prompt']),
-            "scenario_path": extract_path(sample['prompt']),
-            "cumulative_probability": sample['metadata']['cumulativeProbability'],
-            "model_said": {
-                "prediction": sample['metadata']['predictedOutcome'],
-                "label": "REJECTED ❌",
-                "reasoning": "Model incorrectly predicted this outcome"
-            },
-            "actual_outcome": {
-                "answer": sample['metadata']['actualOutcome'],
-                "label": "CHOSEN ✓",
-                "reasoning": "Verified historical outcome"
-            },
-            "dpo_action": f"Decrease P('{sample['rejected']}') and Increase P('{sample['chosen']}')"
-        }
-        comparison['examples'].append(example)
-
     # Save comparison
-    with open(output_file, 'w') as f:
-        json.dump(comparison, f, indent=2)
+    Path(output_file).write_bytes(_dumps(comparison))
 
     print(f"✓ Created comparison examples: {output_file}")
     return comparison
 
-def extract_question(prompt: str) -> str:
-    """Extract the main question from prompt"""
-    lines = prompt.split('\n')
-    for line in lines:
-        if line.startswith('Question:'):
-            return line.replace('Question:', '').strip()
-    return "Unknown question"
-
-def extract_path(prompt: str) -> List[str]:
-    """Extract the scenario path from prompt"""
-    lines = prompt.split('\n')
+def extract_question_and_path(prompt: str) -> Tuple[str, List[str]]:
+    """Extract the main question and the scenario path from prompt in one pass"""
+    question = None
     path = []
-    for line in lines:
-        if line.startswith('[Depth'):
-            path.append(line.strip())
-    return path
-
-def create_architecture_diagram():
-    """Create ASCII art of the DPO pipeline"""
-
-    diagram = """
+    for match in _PROMPT_LINE_RE.finditer(prompt):
+        if match.group(1) is None:
+            path.append(match.group(0).strip())
+        elif question is None:
+            question = match.group(1).replace('Question:', '').strip()
+    return (question if question is not None else "Unknown question"), path
+
+_ARCH_DIAGRAM = """
 ╔══════════════════════════════════════════════════════════════════════════╗
 ║                    DPO TRAINING PIPELINE ARCHITECTURE                    ║
 ╚══════════════════════════════════════════════════════════════════════════╝
@@ -142,15 +196,23 @@ def create_architecture_diagram():
 ╚══════════════════════════════════════════════════════════════════════════╝
 """
 
-    with open('dpo_architecture_diagram.txt', 'w') as f:
-        f.write(diagram)
+def create_architecture_diagram():
+    """Create ASCII art of the DPO pipeline"""
+
+    Path('dpo_architecture_diagram.txt').write_bytes(_ARCH_DIAGRAM.encode('utf-8'))
 
     print("✓ Created architecture diagram: dpo_architecture_diagram.txt")
-    return diagram
+    return _ARCH_DIAGRAM
 
 def create_performance_table(stats: Dict):
     """Create expected performance comparison table"""
 
+    total = stats['totalPaths']
+    correct = stats['correctPaths']
+    incorrect = stats['incorrectPaths']
+    correct_pct = correct * 100.0 / total
+    incorrect_pct = incorrect * 100.0 / total
+
     table = f"""
 ╔══════════════════════════════════════════════════════════════════════════╗
 ║                    EXPECTED DPO TRAINING RESULTS                         ║
@@ -162,9 +224,9 @@ def create_performance_table(stats: Dict):
 
   Dataset Statistics:
   • Total DPO Pairs:      {stats['totalDPOPairs']}
-  • Total Paths:          {stats['totalPaths']}
-  • Correct Predictions:  {stats['correctPaths']} ({float(stats['correctPaths'])/stats['totalPaths']*100:.1f}%)
-  • Wrong Predictions:    {stats['incorrectPaths']} ({float(stats['incorrectPaths'])/stats['totalPaths']*100:.1f}%)
+  • Total Paths:          {total}
+  • Correct Predictions:  {correct} ({correct_pct:.1f}%)
+  • Wrong Predictions:    {incorrect} ({incorrect_pct:.1f}%)
   • LLM Accuracy:         {stats['llmAccuracy']}
 
   Outcome Distribution:
@@ -230,16 +292,12 @@ def create_performance_table(stats: Dict):
 ╚══════════════════════════════════════════════════════════════════════════╝
 """
 
-    with open('dpo_performance_table.txt', 'w') as f:
-        f.write(table)
+    Path('dpo_performance_table.txt').write_bytes(table.encode('utf-8'))
 
     print("✓ Created performance table: dpo_performance_table.txt")
     return table
 
-def create_slide_content():
-    """Create ready-to-use slide content in markdown"""
-
-    slides = """# DPO Training Pipeline for Event Forecasting
+_SLIDE_CONTENT = """# DPO Training Pipeline for Event Forecasting
 ## Reinforcement Learning from Historical Outcomes
 
 ---
@@ -359,34 +417,29 @@ Seed Event → Tree Generation → Path Classification → DPO Pairs
 **This is how we'll deploy AI forecasting at scale.**
 """
 
-    with open('dpo_presentation_slides.md', 'w') as f:
-        f.write(slides)
+def create_slide_content():
+    """Create ready-to-use slide content in markdown"""
+
+    Path('dpo_presentation_slides.md').write_bytes(_SLIDE_CONTENT.encode('utf-8'))
 
     print("✓ Created presentation slides: dpo_presentation_slides.md")
-    return slides
+    return _SLIDE_CONTENT
 
-def main():
-    print("\n" + "="*80)
-    print("  CREATING DPO TRAINING PRESENTATION ASSETS")
-    print("="*80 + "\n")
+_RULE = "=" * 80
 
-    # Load data
-    print("📊 Loading generated training data...")
-    stats, samples = load_data()
+_START_BANNER = f"""
+{_RULE}
+  CREATING DPO TRAINING PRESENTATION ASSETS
+{_RULE}
 
-    # Create assets
-    print("\n🎨 Generating presentation assets...\n")
-
-    comparison = create_comparison_examples(samples, 'dpo_comparison_examples.json')
-    diagram = create_architecture_diagram()
-    table = create_performance_table(stats)
-    slides = create_slide_content()
+📊 Loading generated training data...
+"""
 
-    print("\n" + "="*80)
-    print("  ✅ ALL ASSETS CREATED SUCCESSFULLY")
-    print("="*80)
+_SUMMARY_BANNER = f"""
+{_RULE}
+  ✅ ALL ASSETS CREATED SUCCESSFULLY
+{_RULE}
 
-    print("""
 📁 Files Created:
   1. dpo_comparison_examples.json    - Side-by-side chosen vs rejected examples
   2. dpo_architecture_diagram.txt    - ASCII pipeline architecture
@@ -403,7 +456,27 @@ def main():
   "We built a DPO training pipeline that will improve forecasting accuracy
    from 50% (random) to 85%+ using reinforcement learning from historical
    outcomes - all for ~$3 per training run."
-""")
+
+"""
+
+def main():
+    sys.stdout.write(_START_BANNER)
+
+    # Load data
+    stats, samples = load_data()
+
+    # Create assets
+    sys.stdout.write("\n🎨 Generating presentation assets...\n\n")
+
+    # Close the sample stream explicitly; only the first few samples are read
+    with closing(samples):
+        create_comparison_examples(samples, 'dpo_comparison_examples.json')
+    create_architecture_diagram()
+    create_performance_table(stats)
+    create_slide_content()
+
+    sys.stdout.write(_SUMMARY_BANNER)
+    sys.stdout.flush()
 
 if __name__ == '__main__':
     main()